@@ -2,8 +2,15 @@
 
 # Se importa el framework de administración de Django.
 from django.contrib import admin
+# Count permite contar filas relacionadas en la misma consulta del listado.
+from django.db.models import Count
+# BaseInlineFormSet es el formset que usan los inlines; se extiende para limitar sus filas.
+from django.forms.models import BaseInlineFormSet
+# Utilidades para construir el enlace al listado de opciones desde la página de una pregunta.
+from django.urls import reverse
+from django.utils.html import format_html
 # Se importan todos los modelos de la app para poder registrarlos en el sitio de administración.
-from .models import Course, Lesson, Instructor, Learner, Question, Choice, Submission
+from .models import Course, Lesson, Instructor, Learner, Question, Choice, Submission, Enrollment
 
 
 # === Clases de Administración Inline ===
@@ -15,10 +22,25 @@ class QuestionInline(admin.StackedInline):
     model = Question # Especifica que el modelo a editar "inline" es Question.
     extra = 1        # Muestra 1 formulario vacío extra para añadir una nueva pregunta.
 
+# Formset que solo carga las primeras 'per_page' opciones de la pregunta.
+# El resto se puede editar desde el listado de Choices (ver QuestionAdmin.all_choices).
+class LimitedChoiceFormSet(BaseInlineFormSet):
+    per_page = 20
+
+    def get_queryset(self):
+        # El formset ya filtra por la pregunta y ordena por 'pk'; aquí solo se aplica el límite.
+        # Se guarda el queryset recortado para que todas las filas salgan de una única consulta.
+        if not hasattr(self, '_limited_queryset'):
+            self._limited_queryset = super().get_queryset()[:self.per_page]
+        return self._limited_queryset
+
 # Permite editar Opciones (Choices) directamente desde la página de una Pregunta.
-class ChoiceInline(admin.StackedInline):
+class ChoiceInline(admin.TabularInline):
+    # 'admin.TabularInline' muestra las opciones en una tabla compacta, una fila por opción.
     model = Choice # El modelo a editar es Choice.
     extra = 1      # Muestra 1 formulario vacío extra para una nueva opción.
+    # Limita el número de opciones que se renderizan en la página de una pregunta.
+    formset = LimitedChoiceFormSet
 
 # Permite editar Lecciones directamente desde la página de un Curso.
 class LessonInline(admin.StackedInline):
@@ -43,6 +65,13 @@ class CourseAdmin(admin.ModelAdmin):
     # 'search_fields' añade una barra de búsqueda que buscará en los campos 'name' y 'description'.
     search_fields = ['name', 'description']
 
+    # El selector de 'instructors' muestra cada Instructor con su '__str__', que usa 'user.username'.
+    # Se carga el usuario con un JOIN para no hacer una consulta por cada instructor de la lista.
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        if db_field.name == 'instructors':
+            kwargs['queryset'] = Instructor.objects.select_related('user')
+        return super().formfield_for_manytomany(db_field, request, **kwargs)
+
 
 # Personalización para el modelo Lesson.
 class LessonAdmin(admin.ModelAdmin):
@@ -56,6 +85,83 @@ class QuestionAdmin(admin.ModelAdmin):
     inlines = [ChoiceInline]
     # En la lista de preguntas, se mostrará el texto de la pregunta.
     list_display = ['question']
+    # Enlace al listado completo de opciones, ya que el inline solo muestra las primeras.
+    readonly_fields = ['all_choices']
+
+    @admin.display(description='Todas las opciones')
+    def all_choices(self, obj):
+        if obj is None or obj.pk is None:
+            return '-'
+        url = reverse('admin:onlinecourse_choice_changelist') + '?question__id__exact=%s' % obj.pk
+        return format_html('<a href="{}">Ver todas las opciones</a>', url)
+
+
+# Personalización para el modelo Instructor.
+class InstructorAdmin(admin.ModelAdmin):
+    # '__str__' de Instructor usa 'self.user.username'; 'list_select_related' trae el usuario
+    # con un JOIN en la misma consulta en lugar de una consulta extra por fila.
+    list_select_related = ('user',)
+    list_display = ('user', 'full_time', 'total_learners')
+
+
+# Personalización para el modelo Learner.
+class LearnerAdmin(admin.ModelAdmin):
+    # Igual que en InstructorAdmin, se evita una consulta por fila al mostrar el usuario.
+    list_select_related = ('user',)
+    list_display = ('user', 'occupation', 'social_link')
+
+
+# Personalización para el modelo Choice.
+class ChoiceAdmin(admin.ModelAdmin):
+    # 'search_fields' es necesario para poder usar Choice en 'autocomplete_fields'.
+    search_fields = ['choice']
+    # Columnas del listado, al que enlaza QuestionAdmin para ver todas las opciones de una pregunta.
+    list_display = ('choice', 'is_correct')
+    # Orden estable para paginar el listado y los resultados del autocompletado.
+    ordering = ('question', 'id')
+    # Evita el COUNT sobre la tabla completa que el admin ejecuta en cada página del listado
+    # para mostrar el total sin filtrar.
+    show_full_result_count = False
+
+
+# Personalización para el modelo Enrollment.
+class EnrollmentAdmin(admin.ModelAdmin):
+    # 'raw_id_fields' sustituye el <select> con TODOS los usuarios y cursos por un campo de ID
+    # con una ventana de búsqueda, evitando cargar las tablas completas al renderizar el formulario.
+    raw_id_fields = ('user', 'course')
+
+
+# Personalización para el modelo Submission.
+class SubmissionAdmin(admin.ModelAdmin):
+    # Igual que en EnrollmentAdmin, no se cargan todas las inscripciones en un <select>.
+    raw_id_fields = ('enrollment',)
+    # Las opciones seleccionadas se buscan bajo demanda con un widget de autocompletado.
+    autocomplete_fields = ('choices',)
+    # Igual que en ChoiceAdmin, no se cuenta la tabla completa en cada página del listado.
+    show_full_result_count = False
+    # Limita el número de envíos por página del listado.
+    list_per_page = 50
+    # Columnas del listado: usuario y curso de la inscripción y número de opciones seleccionadas.
+    list_display = ('id', 'user', 'course', 'choice_count')
+
+    # Se cargan la inscripción con su usuario y curso mediante JOIN y se cuentan las opciones
+    # seleccionadas en la misma consulta, así el listado no hace consultas extra por fila.
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'enrollment__user', 'enrollment__course'
+        ).annotate(choice_count=Count('choices'))
+
+    @admin.display(description='User', ordering='enrollment__user__username')
+    def user(self, obj):
+        return obj.enrollment.user.username
+
+    @admin.display(description='Course', ordering='enrollment__course__name')
+    def course(self, obj):
+        return obj.enrollment.course.name
+
+    @admin.display(description='Choices', ordering='choice_count')
+    def choice_count(self, obj):
+        return obj.choice_count
 
 
 # === Registro de Modelos en el Sitio de Administración ===
@@ -66,9 +172,9 @@ admin.site.register(Course, CourseAdmin)
 admin.site.register(Lesson, LessonAdmin)
 # Se registra el modelo Question usando su clase de personalización QuestionAdmin.
 admin.site.register(Question, QuestionAdmin)
-# Los siguientes modelos se registran sin una clase de personalización,
-# por lo que usarán la interfaz por defecto del admin de Django.
-admin.site.register(Choice)
-admin.site.register(Submission)
-admin.site.register(Instructor)
-admin.site.register(Learner)
\ No newline at end of file
+# Se registran el resto de modelos con sus clases de personalización.
+admin.site.register(Choice, ChoiceAdmin)
+admin.site.register(Enrollment, EnrollmentAdmin)
+admin.site.register(Submission, SubmissionAdmin)
+admin.site.register(Instructor, InstructorAdmin)
+admin.site.register(Learner, LearnerAdmin)
\ No newline at end of file
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class OnlinecourseConfig(AppConfig):
     name = 'onlinecourse'
+
+    def ready(self):
+        # Registra los receptores de señales de la app.
+        from . import signals  # noqa: F401
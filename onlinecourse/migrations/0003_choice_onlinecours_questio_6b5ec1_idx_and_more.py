@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-14 03:39
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+
+
+def merge_duplicate_enrollments(apps, schema_editor):
+    # La vista enroll() anterior comprobaba la inscripción antes de crearla, así que peticiones
+    # concurrentes podían dejar varias filas para el mismo (user, course). Antes de añadir la
+    # restricción única se conserva la más antigua, se le mueven los envíos de las demás y
+    # se eliminan las sobrantes.
+    Enrollment = apps.get_model('onlinecourse', 'Enrollment')
+    Submission = apps.get_model('onlinecourse', 'Submission')
+    Course = apps.get_model('onlinecourse', 'Course')
+    duplicates = (
+        Enrollment.objects.values('user_id', 'course_id')
+        .annotate(n=Count('id'), keep_id=Min('id'))
+        .filter(n__gt=1)
+    )
+    for dup in duplicates:
+        extra = Enrollment.objects.filter(
+            user_id=dup['user_id'], course_id=dup['course_id']
+        ).exclude(id=dup['keep_id'])
+        Submission.objects.filter(enrollment__in=extra).update(enrollment_id=dup['keep_id'])
+        extra.delete()
+        # Cada inscripción duplicada también había incrementado el contador del curso.
+        Course.objects.filter(pk=dup['course_id']).update(
+            total_enrollment=F('total_enrollment') - (dup['n'] - 1)
+        )
+    if schema_editor.connection.vendor == 'postgresql':
+        # Se ejecutan las comprobaciones de FK diferidas para permitir el ALTER TABLE siguiente.
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('onlinecourse', '0002_alter_course_id_alter_enrollment_id_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='choice',
+            index=models.Index(fields=['question', 'is_correct'], name='onlinecours_questio_6b5ec1_idx'),
+        ),
+        migrations.RunPython(merge_duplicate_enrollments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='enrollment',
+            constraint=models.UniqueConstraint(fields=('user', 'course'), name='uniq_enrollment'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-14 03:42
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_max_grade(apps, schema_editor):
+    Course = apps.get_model('onlinecourse', 'Course')
+    Question = apps.get_model('onlinecourse', 'Question')
+    totals = Question.objects.filter(course=OuterRef('pk')).values('course').annotate(s=Sum('grade')).values('s')
+    Course.objects.update(max_grade=Coalesce(Subquery(totals), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('onlinecourse', '0003_choice_onlinecours_questio_6b5ec1_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='max_grade',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_max_grade, migrations.RunPython.noop),
+    ]
@@ -89,6 +89,9 @@ class Course(models.Model):
     # Esto permite almacenar información adicional sobre la relación (ej. la fecha de inscripción, la calificación).
     users = models.ManyToManyField(settings.AUTH_USER_MODEL, through='Enrollment')
     total_enrollment = models.IntegerField(default=0)
+    # Suma de los puntajes ('grade') de todas las preguntas del curso. Es un valor desnormalizado
+    # que se mantiene actualizado mediante señales (ver signals.py); por eso no es editable en el admin.
+    max_grade = models.IntegerField(default=0, editable=False)
     is_enrolled = False # Este es un atributo de instancia de Python, NO un campo de la base de datos. Se usaría para lógica en tiempo de ejecución.
 
     def __str__(self):
@@ -129,6 +132,14 @@ class Enrollment(models.Model):
     # Calificación que el usuario le da al curso.
     rating = models.FloatField(default=5.0)
 
+    class Meta:
+        # Un usuario solo puede inscribirse una vez en cada curso.
+        # La restricción crea además un índice único sobre (user, course), que es
+        # justo la forma de las consultas que comprueban si un usuario está inscrito.
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'course'], name='uniq_enrollment'),
+        ]
+
 
 # === Modelo Question (Pregunta) ===
 # Representa una pregunta de un examen o cuestionario.
@@ -142,19 +153,19 @@ class Question(models.Model):
         return 'Question: ' + self.question
 
     # Método de instancia para calcular si el estudiante obtiene el puntaje de esta pregunta.
-    def is_get_score(self, selected_ids):
+    # 'choices' permite pasar las opciones de la pregunta ya cargadas (por ejemplo con
+    # prefetch_related('choice_set')), de modo que la comparación se hace en Python sin consultas.
+    def is_get_score(self, selected_ids, choices=None):
         # self.choice_set es el "RelatedManager" que permite acceder a todas las Choices relacionadas con esta Question.
-        # Primero, cuenta cuántas opciones correctas existen en total para esta pregunta.
-        all_answers = self.choice_set.filter(is_correct=True).count()
-        # Luego, cuenta cuántas de las opciones seleccionadas por el usuario (cuyos IDs vienen en selected_ids) son correctas.
-        # 'id__in' es un "field lookup" que crea una consulta SQL `WHERE id IN (...)`.
-        selected_correct = self.choice_set.filter(is_correct=True, id__in=selected_ids).count()
-        # La lógica es estricta: el usuario obtiene el puntaje solo si el número de respuestas correctas que seleccionó es igual al número total de respuestas correctas posibles.
-        # Esto implica que debe seleccionar TODAS las correctas y NINGUNA incorrecta (asumiendo que las incorrectas no se cuentan aquí).
-        if all_answers == selected_correct:
-            return True
-        else:
-            return False
+        # Si se usó prefetch_related('choice_set'), .all() devuelve la caché sin consultar la base de datos.
+        choices = choices if choices is not None else self.choice_set.all()
+        correct = {choice.id for choice in choices if choice.is_correct}
+        picked = set(selected_ids)
+        # La lógica es estricta: el usuario obtiene el puntaje solo si seleccionó TODAS las opciones
+        # correctas y NINGUNA incorrecta de esta pregunta.
+        return correct.issubset(picked) and not any(
+            choice.id in picked and not choice.is_correct for choice in choices
+        )
 
 # === Modelo Choice (Opción) ===
 # Representa una opción de respuesta para una Pregunta.
@@ -165,6 +176,17 @@ class Choice(models.Model):
     # Campo booleano que marca si esta es una respuesta correcta.
     is_correct = models.BooleanField(default=False)
 
+    class Meta:
+        # Índice compuesto para las consultas de calificación, que filtran las opciones
+        # de una pregunta según sean correctas o no.
+        # El índice parcial solo contiene las opciones correctas (normalmente una minoría), por lo
+        # que es muy pequeño. Lo usan PostgreSQL y SQLite; en bases de datos sin soporte para
+        # índices parciales Django lo omite y queda el índice compuesto.
+        indexes = [
+            models.Index(fields=['question', 'is_correct']),
+            models.Index(fields=['question'], condition=models.Q(is_correct=True), name='choice_correct_idx'),
+        ]
+
 # === Modelo Submission (Envío) ===
 # Representa el envío de un conjunto de respuestas por parte de un estudiante.
 # Una inscripción puede tener múltiples envíos (intentos).
@@ -0,0 +1,45 @@
+# signals.py
+
+# Se importan las señales que Django emite antes/después de guardar o eliminar un objeto.
+from django.db.models.signals import pre_save, post_save, post_delete
+# 'receiver' es el decorador que conecta una función a una señal.
+from django.dispatch import receiver
+# 'Sum' calcula la suma de un campo directamente en la base de datos.
+from django.db.models import Sum
+
+from .models import Course, Question
+
+
+# Recalcula 'Course.max_grade' (la suma de los puntajes de sus preguntas) de un curso.
+def recompute_max_grade(course_id):
+    max_grade = Question.objects.filter(course_id=course_id).aggregate(s=Sum('grade'))['s'] or 0
+    # update() escribe solo la columna 'max_grade', sin cargar ni guardar el curso completo.
+    Course.objects.filter(pk=course_id).update(max_grade=max_grade)
+
+
+# Antes de guardar una Pregunta existente se recuerda su curso original, para poder
+# recalcular también ese curso si la pregunta se mueve a otro.
+@receiver(pre_save, sender=Question)
+def remember_question_course(sender, instance, **kwargs):
+    instance._old_course_id = None
+    if instance.pk is not None:
+        instance._old_course_id = Question.objects.filter(pk=instance.pk).values_list(
+            'course_id', flat=True
+        ).first()
+
+
+# Recalcula 'Course.max_grade' cada vez que se crea, modifica o elimina una Pregunta.
+# Así las páginas de resultados leen el puntaje máximo del curso sin tener que agregarlo
+# en cada petición.
+# Nota: las operaciones masivas (QuerySet.update / bulk_create) no emiten estas señales.
+@receiver(post_save, sender=Question)
+def update_course_max_grade_on_save(sender, instance, **kwargs):
+    recompute_max_grade(instance.course_id)
+    old_course_id = getattr(instance, '_old_course_id', None)
+    if old_course_id is not None and old_course_id != instance.course_id:
+        recompute_max_grade(old_course_id)
+
+
+@receiver(post_delete, sender=Question)
+def update_course_max_grade_on_delete(sender, instance, **kwargs):
+    recompute_max_grade(instance.course_id)
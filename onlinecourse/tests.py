@@ -1,3 +1,233 @@
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.db import connection
+from django.core.cache import cache
+from django.contrib.auth.models import User
 
-# Create your tests here.
+from .models import Course, Enrollment, Question, Choice, Submission
+
+
+# Crea un curso con dos preguntas: q1 (60 puntos, dos opciones correctas y una incorrecta)
+# y q2 (40 puntos, una correcta y una incorrecta).
+def create_exam():
+    course = Course.objects.create(name='Django', description='Curso de prueba')
+    q1 = Question.objects.create(course=course, question='q1', grade=60)
+    q2 = Question.objects.create(course=course, question='q2', grade=40)
+    choices = {
+        'q1_a': Choice.objects.create(question=q1, choice='a', is_correct=True),
+        'q1_b': Choice.objects.create(question=q1, choice='b', is_correct=True),
+        'q1_c': Choice.objects.create(question=q1, choice='c', is_correct=False),
+        'q2_a': Choice.objects.create(question=q2, choice='a', is_correct=True),
+        'q2_b': Choice.objects.create(question=q2, choice='b', is_correct=False),
+    }
+    return course, choices
+
+
+class ExamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='learner', password='psw')
+        self.client.force_login(self.user)
+        self.course, self.choices = create_exam()
+        Enrollment.objects.create(user=self.user, course=self.course)
+
+    # Envía el examen con las opciones indicadas y devuelve la respuesta de la página de resultados.
+    def submit(self, *keys, extra_ids=()):
+        ids = [self.choices[key].id for key in keys] + list(extra_ids)
+        response = self.client.post(reverse('onlinecourse:submit', args=(self.course.id,)), {'choice': ids})
+        return self.client.get(response['Location'])
+
+    def test_all_correct_gets_full_grade(self):
+        response = self.submit('q1_a', 'q1_b', 'q2_a')
+        self.assertEqual(response.context['grade'], 100)
+
+    def test_wrong_choice_picked_scores_zero_for_question(self):
+        response = self.submit('q1_a', 'q1_b', 'q1_c')
+        self.assertEqual(response.context['grade'], 0)
+
+    def test_partial_answer_scores_zero_for_question(self):
+        response = self.submit('q1_a')
+        self.assertEqual(response.context['grade'], 0)
+
+    def test_pass_threshold_is_relative_to_max_grade(self):
+        # 60 de 100 puntos no supera el 80%; 100 de 100 sí.
+        self.assertFalse(self.submit('q1_a', 'q1_b').context['passed'])
+        self.assertTrue(self.submit('q1_a', 'q1_b', 'q2_a').context['passed'])
+
+    def test_pass_threshold_with_max_grade_other_than_100(self):
+        # Con un máximo de 150, 100 puntos (66%) no aprueba aunque supere 80 en valor absoluto.
+        q3 = Question.objects.create(course=self.course, question='q3', grade=50)
+        Choice.objects.create(question=q3, choice='a', is_correct=True)
+        response = self.submit('q1_a', 'q1_b', 'q2_a')
+        self.assertEqual(response.context['grade'], 100)
+        self.assertFalse(response.context['passed'])
+
+    def test_course_without_questions_cannot_be_passed(self):
+        Question.objects.filter(course=self.course).delete()
+        response = self.submit()
+        self.assertEqual(response.context['grade'], 0)
+        self.assertFalse(response.context['passed'])
+
+    def test_submit_drops_choices_from_other_courses(self):
+        other_course, other_choices = create_exam()
+        self.submit('q2_a', extra_ids=[other_choices['q2_a'].id])
+        submission = Submission.objects.get()
+        self.assertEqual(list(submission.choices.all()), [self.choices['q2_a']])
+
+
+class EnrollmentTests(TestCase):
+    def test_repeated_enroll_counts_once(self):
+        user = User.objects.create_user(username='learner', password='psw')
+        course = Course.objects.create(name='Django', description='Curso de prueba')
+        self.client.force_login(user)
+        url = reverse('onlinecourse:enroll', args=(course.id,))
+        self.client.post(url)
+        self.client.post(url)
+        course.refresh_from_db()
+        self.assertEqual(course.total_enrollment, 1)
+        self.assertEqual(Enrollment.objects.filter(user=user, course=course).count(), 1)
+
+
+class CourseListTests(TestCase):
+    def setUp(self):
+        # La lista de cursos se guarda en la caché LocMem, que se comparte entre tests.
+        cache.clear()
+        self.courses = [
+            Course.objects.create(name='c%d' % i, description='d', total_enrollment=i) for i in range(3)
+        ]
+        self.user = User.objects.create_user(username='learner', password='psw')
+        self.other = User.objects.create_user(username='other', password='psw')
+        Enrollment.objects.create(user=self.user, course=self.courses[0])
+
+    def enrolled_by_name(self):
+        response = self.client.get(reverse('onlinecourse:index'))
+        return {course.name: course.is_enrolled for course in response.context['course_list']}
+
+    # Ejecuta una petición a la lista de cursos y devuelve las consultas SQL realizadas.
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('onlinecourse:index'))
+        return [query['sql'] for query in queries]
+
+    def test_anonymous_user_is_not_enrolled(self):
+        self.assertEqual(self.enrolled_by_name(), {'c0': False, 'c1': False, 'c2': False})
+
+    def test_enrollment_is_per_user_on_the_cached_list(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.enrolled_by_name(), {'c0': True, 'c1': False, 'c2': False})
+        # El segundo usuario recibe la misma lista desde la caché sin heredar 'is_enrolled'.
+        self.client.force_login(self.other)
+        self.assertEqual(self.enrolled_by_name(), {'c0': False, 'c1': False, 'c2': False})
+
+    def test_second_request_skips_course_query(self):
+        self.client.force_login(self.user)
+        self.assertTrue(any('FROM "onlinecourse_course"' in sql for sql in self.list_queries()))
+        self.assertFalse(any('FROM "onlinecourse_course"' in sql for sql in self.list_queries()))
+
+    def test_query_count_does_not_grow_per_course(self):
+        # Si la plantilla usara un campo diferido por .only(), cada curso haría una consulta extra,
+        # tanto con la caché vacía como con las instancias recuperadas de la caché.
+        self.client.force_login(self.user)
+        cold, warm = len(self.list_queries()), len(self.list_queries())
+        for i in range(3, 10):
+            Course.objects.create(name='c%d' % i, description='d')
+        cache.clear()
+        self.assertEqual(len(self.list_queries()), cold)
+        self.assertEqual(len(self.list_queries()), warm)
+
+
+class RegistrationTests(TestCase):
+    def test_duplicate_username_is_rejected(self):
+        User.objects.create_user(username='learner', password='psw')
+        response = self.client.post(reverse('onlinecourse:registration'), {
+            'username': 'learner', 'firstname': 'F', 'lastname': 'L', 'psw': 'psw',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['message'], "El nombre de usuario ya existe.")
+        self.assertEqual(User.objects.filter(username='learner').count(), 1)
+
+
+class MaxGradeTests(TestCase):
+    def setUp(self):
+        self.course_a = Course.objects.create(name='A', description='')
+        self.course_b = Course.objects.create(name='B', description='')
+
+    def assertMaxGrade(self, course, expected):
+        course.refresh_from_db()
+        self.assertEqual(course.max_grade, expected)
+
+    def test_create(self):
+        Question.objects.create(course=self.course_a, question='q1', grade=50)
+        Question.objects.create(course=self.course_a, question='q2', grade=30)
+        self.assertMaxGrade(self.course_a, 80)
+
+    def test_update(self):
+        question = Question.objects.create(course=self.course_a, question='q1', grade=50)
+        question.grade = 20
+        question.save()
+        self.assertMaxGrade(self.course_a, 20)
+
+    def test_move_recomputes_both_courses(self):
+        Question.objects.create(course=self.course_a, question='q1', grade=50)
+        moved = Question.objects.create(course=self.course_a, question='q2', grade=50)
+        Question.objects.create(course=self.course_b, question='q3', grade=70)
+        moved.course = self.course_b
+        moved.save()
+        self.assertMaxGrade(self.course_a, 50)
+        self.assertMaxGrade(self.course_b, 120)
+
+    def test_delete(self):
+        Question.objects.create(course=self.course_a, question='q1', grade=50)
+        question = Question.objects.create(course=self.course_a, question='q2', grade=30)
+        question.delete()
+        self.assertMaxGrade(self.course_a, 50)
+
+
+class QuestionAdminTests(TestCase):
+    def setUp(self):
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'psw')
+        self.client.force_login(admin_user)
+        course = Course.objects.create(name='Django', description='Curso de prueba')
+        self.question = Question.objects.create(course=course, question='q1', grade=50)
+        self.choices = [
+            Choice.objects.create(question=self.question, choice='choice %d' % i) for i in range(25)
+        ]
+        self.url = reverse('admin:onlinecourse_question_change', args=(self.question.id,))
+
+    def test_inline_shows_only_first_20_choices(self):
+        response = self.client.get(self.url)
+        formset = response.context['inline_admin_formsets'][0].formset
+        self.assertEqual(formset.initial_form_count(), 20)
+        self.assertEqual(
+            [form.instance for form in formset.initial_forms], self.choices[:20]
+        )
+
+    def test_all_choices_links_to_filtered_changelist(self):
+        response = self.client.get(self.url)
+        link = reverse('admin:onlinecourse_choice_changelist') + '?question__id__exact=%d' % self.question.id
+        self.assertContains(response, 'href="%s"' % link)
+        changelist = self.client.get(link)
+        self.assertEqual(changelist.status_code, 200)
+        self.assertEqual(changelist.context['cl'].result_count, 25)
+
+    def test_post_edits_shown_choices_and_leaves_the_rest(self):
+        data = {
+            'course': self.question.course_id, 'question': 'q1', 'grade': 50,
+            'choice_set-TOTAL_FORMS': '21', 'choice_set-INITIAL_FORMS': '20',
+            'choice_set-MIN_NUM_FORMS': '0', 'choice_set-MAX_NUM_FORMS': '1000',
+            'choice_set-20-question': self.question.id, 'choice_set-20-choice': 'new',
+        }
+        for i, choice in enumerate(self.choices[:20]):
+            data['choice_set-%d-id' % i] = choice.id
+            data['choice_set-%d-question' % i] = self.question.id
+            data['choice_set-%d-choice' % i] = 'edited %d' % i
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Choice.objects.filter(choice__startswith='edited').count(), 20)
+        self.assertTrue(Choice.objects.filter(choice='new').exists())
+        # Las 5 opciones que no se mostraron en el inline no cambian.
+        self.assertEqual(
+            list(Choice.objects.filter(id__in=[c.id for c in self.choices[20:]]).values_list('choice', flat=True)),
+            ['choice %d' % i for i in range(20, 25)],
+        )
+        self.assertEqual(Choice.objects.filter(question=self.question).count(), 26)
@@ -5,6 +5,14 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 from django.views import generic # Para Vistas Basadas en Clases (CBV) genéricas.
+# 'IntegrityError' se lanza al violar una restricción (p. ej. un valor único repetido).
+# 'transaction' permite agrupar varias consultas en una transacción atómica.
+from django.db import IntegrityError, transaction
+# Expresiones del ORM para agregaciones (Count, Sum), filtros y referencias a columnas (Q, F)
+# y para personalizar la precarga de relaciones (Prefetch).
+from django.db.models import Count, F, Prefetch, Q, Sum
+# Framework de caché de Django, usado para guardar la lista de cursos más populares.
+from django.core.cache import cache
 
 # Importaciones de los modelos de la aplicación para interactuar con la base de datos.
 from .models import Course, Enrollment, Question, Choice, Submission
@@ -26,30 +34,26 @@ def registration_request(request):
     elif request.method == 'POST':
         # Si la petición es POST, procesa los datos del formulario.
         username = request.POST['username']
-        # Se verifica si el nombre de usuario ya existe en la base de datos.
         try:
-            User.objects.get(username=username)
-            user_exist = True
-        except User.DoesNotExist:
-            user_exist = False
-        
-        if not user_exist:
-            # Si el usuario no existe, se crea con los datos proporcionados.
+            # Se crea el usuario directamente con los datos proporcionados.
             # create_user se encarga de hashear la contraseña de forma segura.
-            user = User.objects.create_user(
-                username=username,
-                first_name=request.POST['firstname'],
-                last_name=request.POST['lastname'],
-                password=request.POST['psw']
-            )
-            # Se inicia la sesión para el usuario recién creado.
-            login(request, user)
-            # Se redirige al usuario a la página principal.
-            return redirect("onlinecourse:index")
-        else:
-            # Si el usuario ya existe, se devuelve al formulario con un mensaje de error.
+            # El atomic() interno aísla el INSERT fallido para que la transacción siga siendo usable.
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    username=username,
+                    first_name=request.POST['firstname'],
+                    last_name=request.POST['lastname'],
+                    password=request.POST['psw']
+                )
+        except IntegrityError:
+            # La restricción UNIQUE de 'username' rechaza el INSERT si el usuario ya existe,
+            # así que se devuelve al formulario con un mensaje de error.
             context['message'] = "El nombre de usuario ya existe."
             return render(request, 'onlinecourse/user_registration_bootstrap.html', context)
+        # Se inicia la sesión para el usuario recién creado.
+        login(request, user)
+        # Se redirige al usuario a la página principal.
+        return redirect("onlinecourse:index")
 
 def login_request(request):
     context = {}
@@ -84,13 +88,23 @@ class CourseListView(generic.ListView):
     # Sobrescribe el método que obtiene el conjunto de datos (queryset).
     def get_queryset(self):
         user = self.request.user
-        # Obtiene los 10 cursos con más inscripciones.
-        courses = Course.objects.order_by('-total_enrollment')[:10]
+        # Los 10 cursos con más inscripciones son iguales para todos los usuarios y cambian
+        # lentamente, así que se guardan en caché durante 60 segundos.
+        courses = cache.get('top_courses')
+        if courses is None:
+            # Solo se cargan las columnas que usa la plantilla course_list_bootstrap.html.
+            courses = list(Course.objects.only(
+                'id', 'name', 'image', 'description', 'total_enrollment'
+            ).order_by('-total_enrollment')[:10])
+            cache.set('top_courses', courses, 60)
         if user.is_authenticated:
-            # Para cada curso, verifica si el usuario actual está inscrito.
-            # El resultado se almacena en el atributo 'is_enrolled' del objeto curso.
+            # Con una sola consulta se obtienen los cursos de la lista en los que el usuario
+            # está inscrito, y el resultado se almacena en el atributo 'is_enrolled' de cada curso.
+            enrolled_ids = set(Enrollment.objects.filter(
+                user=user, course_id__in=[course.pk for course in courses]
+            ).values_list('course_id', flat=True))
             for course in courses:
-                course.is_enrolled = check_if_enrolled(user, course)
+                course.is_enrolled = course.pk in enrolled_ids
         return courses
 
 # Vista para mostrar los detalles de un curso. Hereda de DetailView.
@@ -100,23 +114,23 @@ class CourseDetailView(generic.DetailView):
 
 # === Vistas Basadas en Funciones (FBV) para Lógica de Cursos ===
 
-# Función auxiliar para comprobar si un usuario está inscrito en un curso.
-def check_if_enrolled(user, course):
-    # Realiza una consulta para contar las inscripciones que coincidan con el usuario y el curso.
-    return Enrollment.objects.filter(user=user, course=course).count() > 0
-
 # Vista para manejar la inscripción de un usuario a un curso.
 def enroll(request, course_id):
     # get_object_or_404 busca un objeto y devuelve un error 404 si no lo encuentra.
     course = get_object_or_404(Course, pk=course_id)
     user = request.user
 
-    # Si el usuario está autenticado y no está ya inscrito...
-    if user.is_authenticated and not check_if_enrolled(user, course):
-        # ...se crea una nueva inscripción.
-        Enrollment.objects.create(user=user, course=course, mode='honor')
-        course.total_enrollment += 1
-        course.save()
+    if user.is_authenticated:
+        with transaction.atomic():
+            # get_or_create solo crea la inscripción si el usuario no estaba ya inscrito.
+            _, created = Enrollment.objects.get_or_create(
+                user=user, course=course, defaults={'mode': 'honor'}
+            )
+            if created:
+                # F() incrementa el contador directamente en la base de datos
+                # ('total_enrollment = total_enrollment + 1'), evitando perder
+                # actualizaciones cuando varios usuarios se inscriben a la vez.
+                Course.objects.filter(pk=course.pk).update(total_enrollment=F('total_enrollment') + 1)
     # Redirige al usuario de vuelta a la página de detalles del curso.
     # reverse() construye la URL a partir del nombre definido en urls.py.
     return HttpResponseRedirect(reverse(viewname='onlinecourse:course_details', args=(course.id,)))
@@ -132,10 +146,13 @@ def submit(request, course_id):
     
     # Se crea un nuevo objeto Submission ligado a la inscripción.
     submission = Submission.objects.create(enrollment=enrollment)
-    # Se extraen los IDs de las respuestas seleccionadas y se asocian al envío.
-    # .set() es el método para actualizar una relación ManyToMany.
-    choices = extract_answers(request)
-    submission.choices.set(choices)
+    # Se extraen los IDs de las respuestas seleccionadas y se descartan los que no
+    # pertenecen a preguntas de este curso (por ejemplo, si se manipuló el formulario).
+    choices = Choice.objects.filter(
+        id__in=extract_answers(request), question__course_id=course_id
+    ).values_list('id', flat=True)
+    # .add() inserta todas las filas de la tabla intermedia ManyToMany en un único INSERT.
+    submission.choices.add(*choices)
     submission_id = submission.id
 
     # Se redirige a la página de resultados, pasando los IDs necesarios.
@@ -143,44 +160,48 @@ def submit(request, course_id):
 
 # Función auxiliar para extraer las respuestas del formulario del examen.
 def extract_answers(request):
-    submitted_answers = []
-    # Itera sobre todas las claves en los datos POST del formulario.
-    for key in request.POST:
-        # Busca claves que comiencen con 'choice', una convención para nombrar los inputs de las respuestas.
-        if key.startswith('choice'):
-            # Extrae el valor (que es el ID de la Choice) y lo añade a la lista.
-            choice_id = int(request.POST[key])
-            submitted_answers.append(choice_id)
-    return submitted_answers
+    # Todos los checkbox de respuestas se llaman 'choice', así que getlist() devuelve
+    # directamente los valores (IDs de las Choices) seleccionados.
+    return [int(choice_id) for choice_id in request.POST.getlist('choice')]
 
 # Vista para mostrar los resultados de un examen.
 def show_exam_result(request, course_id, submission_id):
     context = {}
-    course = get_object_or_404(Course, pk=course_id)
-    submission = Submission.objects.get(id=submission_id)
+    # Se obtiene el envío junto con su inscripción y curso (JOIN) y, en una consulta adicional,
+    # las opciones seleccionadas con sus preguntas. Los accesos posteriores usan esa caché.
+    submission = get_object_or_404(
+        Submission.objects.select_related('enrollment__course').prefetch_related(
+            Prefetch('choices', queryset=Choice.objects.select_related('question'))
+        ),
+        id=submission_id,
+    )
+    course = submission.enrollment.course
     # Se obtienen todas las opciones que el usuario seleccionó en este envío.
     selected_choices = submission.choices.all()
-
-    total_score = 0
-    # Se obtienen todas las preguntas del curso.
-    questions = course.question_set.all()
-
-    # Se itera sobre cada pregunta para calificarla.
-    for question in questions:
-        # Se obtienen las opciones correctas para la pregunta actual.
-        correct_choices = question.choice_set.filter(is_correct=True)
-        # Se obtienen las opciones que el usuario seleccionó para la pregunta actual.
-        user_choices_for_question = selected_choices.filter(question=question)
-
-        # Se comparan los conjuntos (sets) de opciones. Usar sets es robusto porque no importa el orden.
-        # Si el conjunto de opciones correctas es idéntico al conjunto de opciones seleccionadas por el usuario...
-        if set(correct_choices) == set(user_choices_for_question):
-            # ...el usuario obtiene el puntaje de esa pregunta.
-            total_score += question.grade
+    submitted_ids = [choice.id for choice in selected_choices]
+
+    # Se califica todo el examen en una sola consulta. Para cada pregunta se cuentan
+    # sus opciones correctas, las correctas seleccionadas y las incorrectas seleccionadas.
+    graded = Question.objects.filter(course=course).annotate(
+        total_correct=Count('choice', filter=Q(choice__is_correct=True)),
+        picked_correct=Count('choice', filter=Q(choice__is_correct=True, choice__id__in=submitted_ids)),
+        picked_wrong=Count('choice', filter=Q(choice__is_correct=False, choice__id__in=submitted_ids)),
+    )
+    # El usuario obtiene el puntaje de una pregunta solo si seleccionó TODAS las opciones
+    # correctas y NINGUNA incorrecta; se suman los puntajes de esas preguntas.
+    total_score = graded.filter(
+        total_correct=F('picked_correct'), picked_wrong=0
+    ).aggregate(s=Sum('grade'))['s'] or 0
 
     context['course'] = course
     context['grade'] = total_score
-    context['choices'] = selected_choices
+    # Se aprueba con más del 80% del puntaje máximo del curso. Un curso sin preguntas
+    # (max_grade == 0) no se puede aprobar.
+    context['passed'] = course.max_grade > 0 and total_score * 100 > 80 * course.max_grade
+    # La plantilla compara IDs enteros (un set) en lugar de buscar objetos Choice en una lista.
+    context['selected_ids'] = set(submitted_ids)
+    # Las preguntas se cargan con sus opciones en dos consultas, en lugar de una por pregunta.
+    context['questions'] = course.question_set.prefetch_related('choice_set')
 
     # Se renderiza la plantilla de resultados con el contexto calculado.
     return render(request, 'onlinecourse/exam_result_bootstrap.html', context)
\ No newline at end of file